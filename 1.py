@@ -8,6 +8,9 @@ import random
 import os
 import subprocess
 import ctypes
+import sqlite3
+import statistics
+import argparse
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                             QWidget, QPushButton, QLabel, QProgressBar, QGroupBox,
                             QComboBox, QSpinBox, QCheckBox, QMessageBox)
@@ -27,6 +30,59 @@ except ImportError:
 _last_temp_check = 0
 _last_temp_value = 0
 
+# Префиксы виртуальных блочных устройств, которые не показываем в мониторинге дисков
+_IGNORED_DISK_PREFIXES = ('loop', 'ram', 'zram', 'fd', 'sr')
+
+# История прогонов стресс-теста
+HISTORY_DB_PATH = os.path.join(os.path.expanduser("~"), ".stress_test_history.db")
+MIN_RECORDED_RUN_SECONDS = 10  # Более короткие прогоны не сохраняются
+REGRESSION_THRESHOLD_PCT = 5.0  # Минимальное относительное ухудшение метрики
+REGRESSION_Z_SCORE = 3.5  # Порог робастного z-score относительно медианы
+MIN_SIGNIFICANT_RUNS = 3  # Минимум прошлых прогонов для проверки значимости
+DURATION_TOLERANCE = 0.25  # Сравниваются только прогоны с длительностью +-25%
+
+# Метрики производительности, по которым ищутся регрессии: True - больше значит лучше.
+# Остальные метрики (cpu_avg, memory_avg) отражают фоновую нагрузку и сохраняются как контекст
+_METRIC_HIGHER_IS_BETTER = {
+    'cpu_freq_avg': True,
+    'cpu_freq_min': True,
+    'cpu_temp_max': False
+}
+
+# Поля кольцевого буфера высокочастотной выборки
+FAST_FIELDS = ('time', 'cpu_busy', 'cpu_total', 'mem_total', 'mem_available',
+               'disk_read_bytes', 'disk_write_bytes', 'disk_busy_ms', 'net_rx_bytes', 'net_tx_bytes')
+_F = {name: i for i, name in enumerate(FAST_FIELDS)}
+FAST_SAMPLE_RATES = (100, 250, 500, 1000)  # Гц
+PROC_LAYOUT_CHECK_SECONDS = 1.0  # Период проверки списка дисков и сетевых интерфейсов
+PROC_STAT_SLOT = 512  # Слот под первую строку /proc/stat, байт
+_POW10 = 10.0 ** np.arange(20)
+# Таблицы символов для разбора /proc: разделители (пробел, \t, \n, ':') и нецифровые символы слов
+_SEP_TABLE = np.zeros(256, dtype=bool)
+_SEP_TABLE[[9, 10, 32, 58]] = True
+_NON_DIGIT_TABLE = np.ones(256, dtype=bool)
+_NON_DIGIT_TABLE[48:58] = False
+_NON_DIGIT_TABLE[_SEP_TABLE] = False
+
+def is_whole_disk(name):
+    """Является ли блочное устройство целым физическим диском.
+    
+    На Linux отбрасываются разделы (их нет в /sys/block) и составные
+    устройства dm/md (у них непустой slaves), чтобы один и тот же I/O
+    не учитывался несколько раз. На других платформах проверяется только имя.
+    """
+    if name.startswith(_IGNORED_DISK_PREFIXES):
+        return False
+    if platform.system() != "Linux":
+        return True
+    sys_path = os.path.join('/sys/block', name.replace('/', '!'))
+    if not os.path.isdir(sys_path):
+        return False
+    try:
+        return not os.listdir(os.path.join(sys_path, 'slaves'))
+    except OSError:
+        return True
+
 # Функция для проверки прав администратора
 def is_admin():
     try:
@@ -54,6 +110,9 @@ class MonitoringGraph(pg.PlotWidget):
         self.disk_line = self.plot(pen='g', name='Disk')
         self.cpu_temp_line = self.plot(pen='y', name='CPU Temp')
         
+        # Линии утилизации отдельных дисков создаются по мере обнаружения устройств
+        self.disk_device_lines = {}
+        
         # Легенда
         self.addLegend()
         
@@ -63,7 +122,7 @@ class MonitoringGraph(pg.PlotWidget):
             'cpu': [], 'memory': [], 'disk': [], 'cpu_temp': []
         }
 
-    def update_graph(self, data_history):
+    def update_graph(self, data_history, disk_io_history=None):
         """Обновление графика с использованием pyqtgraph [[8]]"""
         for key in self.data:
             if key in data_history:
@@ -78,6 +137,25 @@ class MonitoringGraph(pg.PlotWidget):
         if self.data['cpu_temp']:
             temps = [min(t, 100) for t in self.data['cpu_temp']]
             self.cpu_temp_line.setData(x, temps)
+            
+        # Утилизация отдельных дисков (%)
+        disk_io_history = disk_io_history or {}
+        for device in list(self.disk_device_lines):
+            if device not in disk_io_history:
+                # Устройство отключено - убираем его линию
+                self.removeItem(self.disk_device_lines.pop(device))
+                
+        for device, values in disk_io_history.items():
+            values = values[-self.max_points:]
+            line = self.disk_device_lines.get(device)
+            if line is None:
+                pen = pg.mkPen(pg.intColor(len(self.disk_device_lines), hues=8),
+                               style=Qt.DashLine)
+                line = self.plot(pen=pen, name=f"{device} util")
+                self.disk_device_lines[device] = line
+            # Выравнивание по правому краю: последняя точка совпадает по времени с CPU/RAM
+            offset = max(len(x) - len(values), 0)
+            line.setData(list(range(offset, offset + len(values))), values)
 
 class SystemMonitor(QObject):
     update_signal = pyqtSignal(dict)
@@ -97,6 +175,25 @@ class SystemMonitor(QObject):
         self.stress_start_time = 0
         self.last_update = {'cpu': 0, 'ram': 0, 'disk': 0}  # Кэш для оптимизации обновления UI
         
+        # Мониторинг отдельных дисков
+        self.disk_io_history = {}  # Утилизация (%) по каждому блочному устройству
+        self._last_disk_io = None  # Предыдущий снимок disk_io_counters(perdisk=True)
+        self._last_disk_io_time = 0
+        self._partitions = []
+        self._last_partitions_check = 0
+        
+        # Высокочастотная выборка (None - выключена)
+        self.fast_sampler = None
+        
+        # Метрики текущего прогона и история прогонов
+        self.stress_samples = []
+        self.last_comparison = None  # None - прогон не сохранен, [] - не с чем сравнить
+        try:
+            self.history = BenchmarkHistory()
+        except sqlite3.Error as e:
+            print(f"Ошибка открытия базы истории прогонов: {e}")
+            self.history = None
+        
     def start_monitoring(self):
         """Запуск мониторинга системы"""
         self.running = True
@@ -107,8 +204,18 @@ class SystemMonitor(QObject):
     def stop_monitoring(self):
         """Остановка мониторинга"""
         self.running = False
+        self.set_fast_sampling(0)
         self.stop_stress_test()
         
+    def set_fast_sampling(self, rate_hz):
+        """Включение высокочастотной выборки с частотой rate_hz (0 - выключить)"""
+        if self.fast_sampler:
+            self.fast_sampler.stop()
+            self.fast_sampler = None
+        if rate_hz:
+            self.fast_sampler = FastSampler(rate_hz)
+            self.fast_sampler.start()
+        
     def start_stress_test(self, cpu=True):
         """Запуск стресс-теста с оптимизацией использования ресурсов"""
         if self.stress_running:
@@ -117,6 +224,7 @@ class SystemMonitor(QObject):
         self.stress_running = True
         self.stop_event = threading.Event()
         self.stress_start_time = time.time()
+        self.stress_samples = []
         
         # Создаем и запускаем поток для стресс-теста
         stress_thread = threading.Thread(
@@ -161,6 +269,35 @@ class SystemMonitor(QObject):
                 
         self.stress_processes = []
         self.stress_running = False
+        self._record_stress_run()
+        
+    def _record_stress_run(self):
+        """Сохранение итогов прогона в историю и сравнение с медианой прошлых прогонов"""
+        self.last_comparison = None
+        duration = time.time() - self.stress_start_time
+        samples = self.stress_samples
+        self.stress_samples = []
+        if self.history is None or not samples or duration < MIN_RECORDED_RUN_SECONDS:
+            return
+            
+        metrics = {
+            'cpu_avg': statistics.mean(s['cpu'] for s in samples),
+            'memory_avg': statistics.mean(s['memory'] for s in samples)
+        }
+        freqs = [s['cpu_freq'] for s in samples if s['cpu_freq'] > 0]
+        if freqs:
+            metrics['cpu_freq_avg'] = statistics.mean(freqs)
+            metrics['cpu_freq_min'] = min(freqs)
+        temps = [s['cpu_temp'] for s in samples if s['cpu_temp'] > 0]
+        if temps:
+            metrics['cpu_temp_max'] = max(temps)
+            
+        try:
+            run_id = self.history.record_run(self._get_cpu_name(), self.stress_start_time,
+                                             duration, metrics)
+            self.last_comparison = self.history.compare(run_id, mode='median')
+        except sqlite3.Error as e:
+            print(f"Ошибка записи истории прогонов: {e}")
         
     def _monitor_loop(self):
         """Основной цикл мониторинга с оптимизированной частотой обновления"""
@@ -178,9 +315,35 @@ class SystemMonitor(QObject):
                         self.data_history[key].append(data[key])
                         if len(self.data_history[key]) > self.max_history:
                             self.data_history[key].pop(0)
+                            
+                # Выборка для итогов прогона стресс-теста
+                if self.stress_running:
+                    self.stress_samples.append({
+                        'cpu': data['cpu'],
+                        'memory': data['memory'],
+                        'cpu_freq': data['cpu_freq'],
+                        'cpu_temp': data['cpu_temp']
+                    })
+                    
+                # История утилизации по устройствам (история отключенных устройств отбрасывается)
+                disk_io = data.get('disk_io')
+                if disk_io:
+                    disk_io_history = {}
+                    for device, stats in disk_io.items():
+                        history = self.disk_io_history.get(device, [])
+                        history.append(stats['util'])
+                        if len(history) > self.max_history:
+                            history.pop(0)
+                        disk_io_history[device] = history
+                    # Замена целиком, чтобы GUI-поток не видел словарь в процессе изменения
+                    self.disk_io_history = disk_io_history
                 
                 # Редкое обновление UI (не чаще 5 раз в секунду)
                 if current_time - last_update >= 0.2:  
+                    # Локальная ссылка: GUI-поток может отключить выборку в любой момент
+                    sampler = self.fast_sampler
+                    if sampler:
+                        data['fast_sampling'] = sampler.summary()
                     data['history'] = self.data_history
                     data['stress_running'] = self.stress_running
                     if self.stress_running:
@@ -211,6 +374,10 @@ class SystemMonitor(QObject):
         data['disk_total'] = self._format_bytes(disk.total)
         data['disk_used'] = self._format_bytes(disk.used)
         
+        # Все смонтированные разделы и скорость I/O по устройствам
+        data['disk_partitions'] = self._get_partitions_usage()
+        data['disk_io'] = self._get_disk_io_rates()
+        
         # CPU temperature and frequency
         cpu_info = self._get_cpu_info()
         data['cpu_temp'] = cpu_info.get('temp', 0)
@@ -222,6 +389,93 @@ class SystemMonitor(QObject):
         
         return data
         
+    def _get_partitions_usage(self):
+        """Заполненность всех смонтированных разделов (список разделов обновляется раз в 10 секунд)"""
+        current_time = time.time()
+        if current_time - self._last_partitions_check >= 10:
+            self._last_partitions_check = current_time
+            try:
+                seen = set()
+                partitions = []
+                for part in psutil.disk_partitions(all=False):
+                    # Один и тот же раздел может быть смонтирован несколько раз (bind mounts)
+                    if part.device in seen:
+                        continue
+                    # squashfs-образы snap (/dev/loopN) и т.п. всегда заполнены на 100%
+                    if os.path.basename(part.device).startswith(_IGNORED_DISK_PREFIXES):
+                        continue
+                    seen.add(part.device)
+                    partitions.append(part)
+                self._partitions = partitions
+            except Exception as e:
+                print(f"Ошибка получения списка разделов: {e}")
+                
+        result = []
+        for part in self._partitions:
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+            except (PermissionError, OSError):
+                # Пустой CD-ROM, отключенный сетевой диск и т.п.
+                continue
+            result.append({
+                'device': part.device,
+                'mountpoint': part.mountpoint,
+                'percent': usage.percent,
+                'total': self._format_bytes(usage.total),
+                'used': self._format_bytes(usage.used)
+            })
+        return result
+        
+    def _get_disk_io_rates(self):
+        """Скорость чтения/записи, IOPS, утилизация и среднее ожидание по каждому устройству.
+        
+        Значения считаются как разница между двумя снимками disk_io_counters(perdisk=True),
+        который вызывается один раз за такт мониторинга.
+        """
+        try:
+            counters = psutil.disk_io_counters(perdisk=True)
+        except Exception as e:
+            print(f"Ошибка получения счетчиков I/O дисков: {e}")
+            return {}
+        if not counters:
+            return {}
+            
+        current_time = time.time()
+        previous, previous_time = self._last_disk_io, self._last_disk_io_time
+        self._last_disk_io, self._last_disk_io_time = counters, current_time
+        
+        # Первый снимок - считать разницу еще не с чем
+        if previous is None:
+            return {}
+        elapsed = current_time - previous_time
+        if elapsed <= 0:
+            return {}
+            
+        result = {}
+        for device, cur in counters.items():
+            if device not in previous or not is_whole_disk(device):
+                continue
+            prev = previous[device]
+            reads = max(cur.read_count - prev.read_count, 0)
+            writes = max(cur.write_count - prev.write_count, 0)
+            ops = reads + writes
+            io_time = max((cur.read_time + cur.write_time) - (prev.read_time + prev.write_time), 0)
+            
+            # busy_time доступен только на Linux и FreeBSD
+            if hasattr(cur, 'busy_time'):
+                util = max(cur.busy_time - prev.busy_time, 0) / (elapsed * 1000) * 100
+            else:
+                util = io_time / (elapsed * 1000) * 100
+                
+            result[device] = {
+                'read_mb_s': max(cur.read_bytes - prev.read_bytes, 0) / elapsed / (1024 * 1024),
+                'write_mb_s': max(cur.write_bytes - prev.write_bytes, 0) / elapsed / (1024 * 1024),
+                'iops': ops / elapsed,
+                'util': min(util, 100.0),
+                'await_ms': io_time / ops if ops else 0.0
+            }
+        return result
+        
     def _get_cpu_info(self):
         """Получение информации о CPU с кэшированием температуры для повышения производительности"""
         result = {
@@ -322,6 +576,453 @@ class SystemMonitor(QObject):
             bytes /= 1024
         return f"{bytes:.2f} PB"
 
+class BenchmarkHistory:
+    """Локальная история прогонов в SQLite с привязкой к конфигурации оборудования"""
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fingerprint TEXT NOT NULL,
+                cpu_name TEXT,
+                cpu_cores INTEGER,
+                memory_gb INTEGER,
+                started_at REAL,
+                duration REAL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS metrics (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                name TEXT NOT NULL,
+                value REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_fingerprint ON runs (fingerprint, id)")
+            
+    def _connect(self):
+        # Отдельное соединение на операцию - запись идет из GUI-потока, чтение может быть из CLI
+        return sqlite3.connect(self.path)
+        
+    @staticmethod
+    def hardware_info(cpu_name):
+        """Параметры оборудования и отпечаток (модель CPU, число ядер, объем памяти)"""
+        cores = psutil.cpu_count(logical=True) or 0
+        memory_gb = round(psutil.virtual_memory().total / (1024 ** 3))
+        fingerprint = f"{cpu_name}|{cores}|{memory_gb}GB"
+        return fingerprint, cores, memory_gb
+        
+    def record_run(self, cpu_name, started_at, duration, metrics):
+        """Сохранение прогона, возвращает его id"""
+        fingerprint, cores, memory_gb = self.hardware_info(cpu_name)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (fingerprint, cpu_name, cpu_cores, memory_gb, started_at, duration) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, cpu_name, cores, memory_gb, started_at, duration))
+            run_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                [(run_id, name, float(value)) for name, value in metrics.items()])
+        return run_id
+        
+    def latest_run_id(self, fingerprint):
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(id) FROM runs WHERE fingerprint = ?",
+                               (fingerprint,)).fetchone()
+        return row[0] if row else None
+        
+    def _run_metrics(self, conn, run_id):
+        return dict(conn.execute("SELECT name, value FROM metrics WHERE run_id = ?", (run_id,)))
+        
+    def compare(self, run_id, mode='previous'):
+        """Сравнение прогона с предыдущим ('previous') или с медианой ('median') для того же оборудования.
+        
+        Базой служат только прогоны с длительностью в пределах DURATION_TOLERANCE, так как
+        температура и минимальная частота сильно зависят от длины прогона.
+        Ухудшение метрики больше чем на REGRESSION_THRESHOLD_PCT считается регрессией только
+        в режиме 'median' при MIN_SIGNIFICANT_RUNS и более прошлых прогонах и робастном z-score
+        (по MAD) выше REGRESSION_Z_SCORE. Сравнение с одним прогоном ('previous') или с медианой
+        меньшего числа прогонов проверить на значимость нельзя, поэтому такое ухудшение
+        помечается как ориентировочное ('indicative'), а не как регрессия.
+        Метрики вне _METRIC_HIGHER_IS_BETTER выводятся только как контекст.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT fingerprint, duration FROM runs WHERE id = ?",
+                               (run_id,)).fetchone()
+            if row is None:
+                return []
+            fingerprint, duration = row
+            current = self._run_metrics(conn, run_id)
+            previous_ids = [r[0] for r in conn.execute(
+                "SELECT id FROM runs WHERE fingerprint = ? AND id < ? AND duration BETWEEN ? AND ? "
+                "ORDER BY id DESC",
+                (fingerprint, run_id, duration * (1 - DURATION_TOLERANCE),
+                 duration * (1 + DURATION_TOLERANCE)))]
+            if mode == 'previous':
+                previous_ids = previous_ids[:1]
+            history = [self._run_metrics(conn, rid) for rid in previous_ids]
+            
+        result = []
+        for name, value in sorted(current.items()):
+            samples = [h[name] for h in history if name in h]
+            if not samples:
+                continue
+            baseline = statistics.median(samples)
+            change_pct = (value - baseline) / baseline * 100 if baseline else 0.0
+            context = name not in _METRIC_HIGHER_IS_BETTER
+            regression = indicative = False
+            
+            if not context:
+                worse_pct = -change_pct if _METRIC_HIGHER_IS_BETTER[name] else change_pct
+                regression = worse_pct > REGRESSION_THRESHOLD_PCT
+                if regression:
+                    if mode != 'median' or len(samples) < MIN_SIGNIFICANT_RUNS:
+                        # Мало данных для проверки значимости
+                        regression, indicative = False, True
+                    else:
+                        mad = statistics.median(abs(s - baseline) for s in samples)
+                        # При нулевом разбросе достаточно относительного порога
+                        if mad > 0:
+                            z_score = 0.6745 * abs(value - baseline) / mad
+                            regression = z_score > REGRESSION_Z_SCORE
+                            
+            result.append({
+                'name': name,
+                'value': value,
+                'baseline': baseline,
+                'change_pct': change_pct,
+                'regression': regression,
+                'indicative': indicative,
+                'context': context
+            })
+        return result
+        
+    @staticmethod
+    def format_comparison(comparison):
+        lines = []
+        for item in comparison:
+            if item['regression']:
+                mark = "РЕГРЕССИЯ"
+            elif item['indicative']:
+                mark = "ухудшение (значимость не проверена)"
+            elif item['context']:
+                mark = "контекст"
+            else:
+                mark = "ok"
+            lines.append(f"{item['name']}: {item['value']:.1f} (база {item['baseline']:.1f}, "
+                         f"{item['change_pct']:+.1f}%) - {mark}")
+        return "\n".join(lines)
+
+def _find_numbers(view):
+    """Границы целых чисел в тексте /proc (массивы начал и концов).
+    
+    Поиск идет векторно по uint8-представлению буфера без создания строк.
+    Разделители - пробел, табуляция, перевод строки и двоеточие; токены с
+    нецифровыми символами (имена устройств, заголовки) отбрасываются.
+    Первый и последний байт view должны быть разделителями.
+    """
+    word = ~_SEP_TABLE.take(view)
+    bounds = np.flatnonzero(word[1:] != word[:-1]) + 1
+    starts = bounds[0::2]
+    ends = bounds[1::2]
+    if starts.size == 0:
+        return starts, ends
+    numeric = ~np.logical_or.reduceat(_NON_DIGIT_TABLE.take(view), starts)
+    return starts[numeric], ends[numeric]
+
+def _parse_numbers(view, starts, ends):
+    """Значения чисел с заданными границами (float64)"""
+    lengths = ends - starts
+    if lengths.size == 0:
+        return np.empty(0)
+    # Цифры выравниваются по правому краю в матрицу и сворачиваются степенями 10
+    width = min(int(lengths.max()), _POW10.size)
+    cols = np.arange(width - 1, -1, -1)
+    index = ends[:, None] - 1 - cols
+    digits = np.where(cols < lengths[:, None], view[np.maximum(index, 0)] - 48.0, 0.0)
+    return digits @ _POW10[cols]
+
+class ProcFastCollector:
+    """Сборщик метрик из /proc для высокочастотной выборки (только Linux).
+    
+    Файлы /proc/stat, /proc/meminfo, /proc/diskstats и /proc/net/dev остаются
+    открытыми и перечитываются через pread подряд в один заранее выделенный
+    буфер. За проход по буферу находятся границы всех чисел, а в значения
+    переводятся только нужные. Номера нужных чисел определяются один раз и
+    пересчитываются при изменении количества чисел или (проверка раз в
+    PROC_LAYOUT_CHECK_SECONDS) списка дисков и сетевых интерфейсов.
+    """
+    FILES = {
+        'stat': '/proc/stat',
+        'meminfo': '/proc/meminfo',
+        'diskstats': '/proc/diskstats',
+        'net': '/proc/net/dev'
+    }
+    
+    def __init__(self):
+        self._fds = {}
+        try:
+            for key, path in self.FILES.items():
+                self._fds[key] = os.open(path, os.O_RDONLY)
+        except OSError:
+            self.close()
+            raise
+        self._stat_slot = PROC_STAT_SLOT
+        self._allocate(16384)
+        self._build_layout()
+        
+    def _allocate(self, size):
+        self._buffer = bytearray(size)
+        self._memory = memoryview(self._buffer)
+        self._view = np.frombuffer(self._buffer, dtype=np.uint8)
+        
+    def _read_all(self):
+        """Чтение всех файлов подряд в общий буфер, возвращает длину заполненной части.
+        
+        Буфер начинается с перевода строки, каждый файл им заканчивается, поэтому
+        содержимое соседних файлов не склеивается. Из /proc/stat нужна только
+        первая строка, поэтому он читается в небольшой слот фиксированного размера
+        (остальной файл со строкой intr растет вместе со счетчиками прерываний).
+        """
+        self._buffer[0] = 10
+        self._offsets = {}
+        offset = 1
+        for key, fd in self._fds.items():
+            if key == 'stat':
+                n = os.preadv(fd, [self._memory[offset:offset + self._stat_slot]], 0)
+                n = self._buffer.find(b'\n', offset, offset + n) + 1 - offset
+                if n <= 0:
+                    # Первая строка не поместилась в слот - увеличиваем слот (и буфер)
+                    self._stat_slot *= 2
+                    if self._stat_slot > len(self._buffer) // 2:
+                        self._allocate(len(self._buffer) * 2)
+                    return self._read_all()
+            else:
+                free = len(self._buffer) - offset
+                n = os.preadv(fd, [self._memory[offset:]], 0)
+                if n == free:
+                    # Файлы не поместились (добавились устройства) - увеличиваем буфер
+                    self._allocate(len(self._buffer) * 2)
+                    return self._read_all()
+            self._offsets[key] = (offset, offset + n)
+            offset += n
+        return offset
+        
+    def _lines(self, key):
+        start, end = self._offsets[key]
+        return bytes(self._buffer[start:end]).decode('ascii', 'replace').splitlines()
+        
+    def _device_names(self):
+        """Имена дисков и сетевых интерфейсов в порядке строк последнего чтения"""
+        disks = [line.split()[2] for line in self._lines('diskstats') if line.strip()]
+        interfaces = [line.split(':')[0].strip() for line in self._lines('net')[2:] if line.strip()]
+        return disks, interfaces
+        
+    def _devices_changed(self):
+        """Редкая проверка, не сменился ли набор устройств при том же количестве чисел"""
+        self._layout_checked = time.perf_counter()
+        return self._device_names() != self._devices
+        
+    def _build_layout(self):
+        """Определение номеров нужных чисел в буфере (выполняется редко)"""
+        self._read_all()
+        self._devices = self._device_names()
+        self._layout_checked = time.perf_counter()
+        
+        # Первая строка /proc/stat: user nice system idle iowait irq softirq steal ...
+        stat_count = len(self._lines('stat')[0].split()) - 1
+        wanted = [np.arange(8)]
+        base = stat_count
+        
+        # В каждой строке meminfo ровно одно число (в кБ)
+        names = [line.split(':')[0] for line in self._lines('meminfo') if line.strip()]
+        wanted.append(base + np.array([names.index('MemTotal'), names.index('MemAvailable')]))
+        base += len(names)
+        
+        # diskstats: major minor [name] reads merged sectors ms writes merged sectors ms in_flight io_ms ...
+        # Только целые физические устройства, без разделов и составных (dm, md) устройств
+        lines = [line for line in self._lines('diskstats') if line.strip()]
+        disk_cols = len(lines[0].split()) - 1 if lines else 0
+        rows = [i for i, line in enumerate(lines) if is_whole_disk(line.split()[2])]
+        wanted.append((base + np.array(rows, dtype=np.intp)[:, None] * disk_cols
+                       + np.array([4, 8, 11])).ravel())
+        base += len(lines) * disk_cols
+        self._disk_count = len(rows)
+        
+        # net/dev: после двух строк заголовка 8 полей приема и 8 полей передачи, loopback не учитываем
+        lines = [line for line in self._lines('net')[2:] if line.strip()]
+        rows = [i for i, line in enumerate(lines) if line.split(':')[0].strip() != 'lo']
+        wanted.append((base + np.array(rows, dtype=np.intp)[:, None] * 16
+                       + np.array([0, 8])).ravel())
+        base += len(lines) * 16
+        
+        self._wanted = np.concatenate(wanted).astype(np.intp)
+        self._count = base
+        
+    def collect(self, row):
+        """Запись одной выборки в строку кольцевого буфера (массив длины len(FAST_FIELDS))"""
+        row[_F['time']] = time.perf_counter()
+        # _read_all() может заменить буфер, поэтому view берется после чтения
+        length = self._read_all()
+        view = self._view[:length]
+        starts, ends = _find_numbers(view)
+        if (starts.size != self._count
+                or (row[_F['time']] - self._layout_checked >= PROC_LAYOUT_CHECK_SECONDS
+                    and self._devices_changed())):
+            # Подключили/отключили устройство - пересчитываем расположение полей
+            self._build_layout()
+            length = self._read_all()
+            view = self._view[:length]
+            starts, ends = _find_numbers(view)
+        values = _parse_numbers(view, starts[self._wanted], ends[self._wanted])
+        
+        # guest уже входит в user, поэтому суммируются только первые 8 полей
+        total = values[:8].sum()
+        row[_F['cpu_total']] = total
+        row[_F['cpu_busy']] = total - values[3] - values[4]
+        row[_F['mem_total']] = values[8] * 1024
+        row[_F['mem_available']] = values[9] * 1024
+        
+        disk = values[10:10 + self._disk_count * 3].reshape(-1, 3).sum(axis=0)
+        row[_F['disk_read_bytes']] = disk[0] * 512
+        row[_F['disk_write_bytes']] = disk[1] * 512
+        row[_F['disk_busy_ms']] = disk[2]
+        
+        net = values[10 + self._disk_count * 3:].reshape(-1, 2).sum(axis=0)
+        row[_F['net_rx_bytes']] = net[0]
+        row[_F['net_tx_bytes']] = net[1]
+            
+    def close(self):
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = {}
+
+class PsutilCollector:
+    """Запасной сборщик через psutil для платформ без /proc"""
+    def collect(self, row):
+        row[_F['time']] = time.perf_counter()
+        
+        cpu = psutil.cpu_times()
+        total = sum(cpu)
+        row[_F['cpu_total']] = total
+        row[_F['cpu_busy']] = total - cpu.idle - getattr(cpu, 'iowait', 0)
+        
+        mem = psutil.virtual_memory()
+        row[_F['mem_total']] = mem.total
+        row[_F['mem_available']] = mem.available
+        
+        disk = psutil.disk_io_counters()
+        if disk:
+            row[_F['disk_read_bytes']] = disk.read_bytes
+            row[_F['disk_write_bytes']] = disk.write_bytes
+            row[_F['disk_busy_ms']] = getattr(disk, 'busy_time', disk.read_time + disk.write_time)
+            
+        net = psutil.net_io_counters()
+        if net:
+            row[_F['net_rx_bytes']] = net.bytes_recv
+            row[_F['net_tx_bytes']] = net.bytes_sent
+            
+    def close(self):
+        pass
+
+def create_fast_collector():
+    """Быстрый сборщик из /proc на Linux, иначе psutil"""
+    if platform.system() == "Linux" and hasattr(os, 'preadv'):
+        try:
+            return ProcFastCollector()
+        except (OSError, ValueError, IndexError) as e:
+            print(f"Быстрый сборщик /proc недоступен, используется psutil: {e}")
+    return PsutilCollector()
+
+class FastSampler:
+    """Высокочастотная выборка (100 Гц - 1 кГц) в кольцевой буфер NumPy.
+    
+    Собственная нагрузка монитора измеряется как процессорное время потока
+    выборки, отнесенное ко времени работы (в % одного ядра).
+    """
+    def __init__(self, rate_hz, capacity_seconds=10):
+        self.rate_hz = rate_hz
+        self.collector = create_fast_collector()
+        self.capacity = max(int(rate_hz * capacity_seconds), 2)
+        self.buffer = np.zeros((self.capacity, len(FAST_FIELDS)))
+        self.count = 0
+        self.running = False
+        self.error = None  # Текст ошибки, если поток выборки завершился аварийно
+        self._cpu_time = 0.0
+        self._elapsed = 0.0
+        
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._sample_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        
+    def stop(self):
+        """Остановка с ожиданием потока, чтобы буфер и сборщик больше не менялись"""
+        self.running = False
+        thread = getattr(self, 'thread', None)
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        
+    def _sample_loop(self):
+        period = 1.0 / self.rate_hz
+        start_wall = next_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            while self.running:
+                self.collector.collect(self.buffer[self.count % self.capacity])
+                self.count += 1
+                self._cpu_time = time.thread_time() - start_cpu
+                self._elapsed = time.perf_counter() - start_wall
+                
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Не догоняем пропущенные такты, чтобы не нагружать систему
+                    next_time = time.perf_counter()
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            print(f"Ошибка в потоке высокочастотной выборки: {e}")
+        finally:
+            self.running = False
+            self.collector.close()
+            
+    def summary(self, window=1.0):
+        """Средние значения за последние window секунд.
+        
+        Счетчики CPU в /proc/stat обновляются с шагом 10 мс, поэтому загрузка
+        считается по всему окну, а не по соседним выборкам. Окно не больше
+        capacity - 1 строк: следующая по кругу строка может записываться прямо сейчас.
+        Если поток выборки упал, возвращается {'error': ...} вместо устаревших данных.
+        """
+        if self.error:
+            return {'error': self.error}
+        count = self.count
+        n = min(count, self.capacity - 1, int(self.rate_hz * window) + 1)
+        if n < 2:
+            return None
+        rows = self.buffer[np.arange(count - n, count) % self.capacity]
+        delta = rows[-1] - rows[0]
+        dt = delta[_F['time']]
+        if dt <= 0:
+            return None
+            
+        last = rows[-1]
+        return {
+            'collector': type(self.collector).__name__,
+            'rate_hz': self.rate_hz,
+            'actual_hz': (n - 1) / dt,
+            'cpu': delta[_F['cpu_busy']] / delta[_F['cpu_total']] * 100 if delta[_F['cpu_total']] else 0.0,
+            'memory': (1 - last[_F['mem_available']] / last[_F['mem_total']]) * 100 if last[_F['mem_total']] else 0.0,
+            'disk_read_mb_s': delta[_F['disk_read_bytes']] / dt / (1024 * 1024),
+            'disk_write_mb_s': delta[_F['disk_write_bytes']] / dt / (1024 * 1024),
+            'disk_util': min(delta[_F['disk_busy_ms']] / (dt * 1000) * 100, 100.0),
+            'net_rx_mb_s': delta[_F['net_rx_bytes']] / dt / (1024 * 1024),
+            'net_tx_mb_s': delta[_F['net_tx_bytes']] / dt / (1024 * 1024),
+            'overhead_pct': self._cpu_time / self._elapsed * 100 if self._elapsed else 0.0
+        }
+
 class StressTestWorker(QThread):
     finished = pyqtSignal()
     
@@ -400,6 +1101,14 @@ class SystemMonitorApp(QMainWindow):
         self.stop_button.setStyleSheet("font-weight: bold; background-color: #f44336; color: white;")
         control_layout.addWidget(self.start_button)
         control_layout.addWidget(self.stop_button)
+        
+        # Выбор частоты высокочастотной выборки
+        self.sample_rate_combo = QComboBox()
+        self.sample_rate_combo.addItem("Выборка: обычная", 0)
+        for rate in FAST_SAMPLE_RATES:
+            self.sample_rate_combo.addItem(f"Выборка: {rate} Гц", rate)
+        self.sample_rate_combo.currentIndexChanged.connect(self.change_sample_rate)
+        control_layout.addWidget(self.sample_rate_combo)
         main_layout.addLayout(control_layout)
         
         # Группа CPU
@@ -437,6 +1146,14 @@ class SystemMonitorApp(QMainWindow):
         disk_layout.addWidget(self.disk_label)
         disk_layout.addWidget(self.disk_progress)
         disk_layout.addWidget(self.disk_details_label)
+        
+        # Компактная панель по разделам и устройствам
+        self.disk_partitions_label = QLabel("Разделы: N/A")
+        self.disk_partitions_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+        self.disk_io_label = QLabel("I/O: N/A")
+        self.disk_io_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+        disk_layout.addWidget(self.disk_partitions_label)
+        disk_layout.addWidget(self.disk_io_label)
         disk_group.setLayout(disk_layout)
         
         # Компоновка групп
@@ -458,6 +1175,18 @@ class SystemMonitorApp(QMainWindow):
         status_layout.addWidget(self.stress_timer_label)
         main_layout.addLayout(status_layout)
         
+        # Результаты высокочастотной выборки и нагрузка самого монитора
+        self.fast_sampling_label = QLabel("")
+        self.fast_sampling_label.setAlignment(Qt.AlignCenter)
+        self.fast_sampling_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+        main_layout.addWidget(self.fast_sampling_label)
+        
+        # Сравнение с предыдущим прогоном
+        self.history_label = QLabel("")
+        self.history_label.setAlignment(Qt.AlignCenter)
+        self.history_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+        main_layout.addWidget(self.history_label)
+        
         # График
         self.graph = MonitoringGraph(self)
         main_layout.addWidget(self.graph)
@@ -473,7 +1202,13 @@ class SystemMonitorApp(QMainWindow):
     def update_graph(self):
         """Обновление графика с оптимизированной частотой"""
         if hasattr(self.monitor, 'data_history'):
-            self.graph.update_graph(self.monitor.data_history)
+            self.graph.update_graph(self.monitor.data_history, self.monitor.disk_io_history)
+            
+    def change_sample_rate(self):
+        rate = self.sample_rate_combo.currentData()
+        self.monitor.set_fast_sampling(rate)
+        if not rate:
+            self.fast_sampling_label.setText("")
             
     def start_stress_test(self):
         self.start_button.setEnabled(False)
@@ -496,6 +1231,26 @@ class SystemMonitorApp(QMainWindow):
         
         # Остановка стресс-теста
         self.monitor.stop_stress_test()
+        self.show_comparison(self.monitor.last_comparison)
+        
+    def show_comparison(self, comparison):
+        """Отображение сравнения прогона с историей: значимые регрессии - красным, ориентировочные - оранжевым"""
+        if comparison is None:
+            self.history_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+            self.history_label.setText(f"Прогон не сохранен в историю (короче {MIN_RECORDED_RUN_SECONDS} с или база недоступна)")
+            return
+        if not comparison:
+            self.history_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+            self.history_label.setText("История: нет сопоставимых прогонов для сравнения "
+                                       f"(то же оборудование, длительность ±{DURATION_TOLERANCE:.0%})")
+            return
+        self.history_label.setText(BenchmarkHistory.format_comparison(comparison))
+        if any(item['regression'] for item in comparison):
+            self.history_label.setStyleSheet("font-family: monospace; font-size: 9pt; color: red; font-weight: bold;")
+        elif any(item['indicative'] for item in comparison):
+            self.history_label.setStyleSheet("font-family: monospace; font-size: 9pt; color: #e68a00;")
+        else:
+            self.history_label.setStyleSheet("font-family: monospace; font-size: 9pt; color: green;")
         
     def format_time(self, seconds):
         hours = int(seconds // 3600)
@@ -541,6 +1296,32 @@ class SystemMonitorApp(QMainWindow):
                 self.disk_details_label.setText(f"Использовано: {data['disk_used']} / {data['disk_total']}")
                 self.monitor.last_update['disk'] = data['disk']
                 
+            # Панель разделов и устройств
+            if data.get('disk_partitions'):
+                lines = [f"{p['mountpoint']}: {p['percent']:.1f}% ({p['used']} / {p['total']})"
+                         for p in data['disk_partitions']]
+                self.disk_partitions_label.setText("\n".join(lines))
+                
+            if data.get('disk_io'):
+                lines = [f"{device}: R {s['read_mb_s']:.1f} W {s['write_mb_s']:.1f} МБ/с, "
+                         f"{s['iops']:.0f} IOPS, {s['util']:.0f}%, {s['await_ms']:.1f} мс"
+                         for device, s in sorted(data['disk_io'].items())]
+                self.disk_io_label.setText("\n".join(lines))
+                
+            # Высокочастотная выборка
+            fast = data.get('fast_sampling')
+            if fast and fast.get('error'):
+                self.fast_sampling_label.setStyleSheet("font-family: monospace; font-size: 9pt; color: red;")
+                self.fast_sampling_label.setText(f"Высокочастотная выборка остановлена: {fast['error']}")
+            elif fast:
+                self.fast_sampling_label.setStyleSheet("font-family: monospace; font-size: 9pt;")
+                self.fast_sampling_label.setText(
+                    f"{fast['collector']}: {fast['actual_hz']:.0f}/{fast['rate_hz']} Гц, "
+                    f"CPU {fast['cpu']:.1f}%, RAM {fast['memory']:.1f}%, "
+                    f"диск R {fast['disk_read_mb_s']:.1f} W {fast['disk_write_mb_s']:.1f} МБ/с, "
+                    f"сеть ↓{fast['net_rx_mb_s']:.2f} ↑{fast['net_tx_mb_s']:.2f} МБ/с, "
+                    f"нагрузка монитора {fast['overhead_pct']:.1f}% CPU")
+                
             # Обновление таймера стресс-теста
             if 'stress_time' in data:
                 formatted_time = self.format_time(data['stress_time'])
@@ -716,9 +1497,60 @@ def create_and_run_c_stress(stop_event):
     except Exception as e:
         print(f"Ошибка при запуске C-стресс-теста: {e}")
 
+def compare_cli(mode):
+    """Сравнение последнего прогона на этом оборудовании с историей.
+    
+    Код возврата: 0 - значимых регрессий нет, 1 - найдена статистически значимая регрессия
+    (только в режиме 'median', см. BenchmarkHistory.compare), 2 - нет данных для сравнения.
+    Ориентировочные ухудшения, в том числе любые в режиме 'previous', выводятся, но на код
+    возврата не влияют.
+    """
+    history = BenchmarkHistory()
+    fingerprint, _, _ = history.hardware_info(SystemMonitor()._get_cpu_name())
+    run_id = history.latest_run_id(fingerprint)
+    comparison = history.compare(run_id, mode=mode) if run_id else []
+    if not comparison:
+        print(f"Нет сопоставимых прогонов для сравнения ({fingerprint})")
+        return 2
+    print(f"Оборудование: {fingerprint}")
+    print(BenchmarkHistory.format_comparison(comparison))
+    return 1 if any(item['regression'] for item in comparison) else 0
+
+def fast_sample_cli(rate_hz, duration):
+    """Проверка высокочастотной выборки без GUI: фактическая частота и нагрузка монитора"""
+    sampler = FastSampler(rate_hz)
+    sampler.start()
+    time.sleep(duration)
+    sampler.stop()
+    summary = sampler.summary(window=duration)
+    if not summary or summary.get('error'):
+        print(f"Не удалось собрать выборку: {summary['error'] if summary else 'нет данных'}")
+        return 1
+    print(f"Сборщик: {summary['collector']}")
+    print(f"Частота: {summary['actual_hz']:.1f} / {rate_hz} Гц")
+    print(f"Нагрузка монитора: {summary['overhead_pct']:.2f}% одного ядра CPU")
+    return 0
+
 if __name__ == "__main__":
     multiprocessing.freeze_support()
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="System Monitor & Stress Test")
+    parser.add_argument('--compare', choices=['previous', 'median'],
+                        help="сравнить последний прогон с историей и выйти")
+    parser.add_argument('--fast-sample', type=int, metavar='HZ',
+                        help="измерить высокочастотную выборку с частотой HZ и выйти")
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help="длительность измерения для --fast-sample, с")
+    args, qt_args = parser.parse_known_args()
+    if args.fast_sample is not None and args.fast_sample <= 0:
+        parser.error("--fast-sample: частота должна быть больше 0")
+    if args.duration <= 0:
+        parser.error("--duration: длительность должна быть больше 0")
+    if args.compare:
+        sys.exit(compare_cli(args.compare))
+    if args.fast_sample is not None:
+        sys.exit(fast_sample_cli(args.fast_sample, args.duration))
+        
+    app = QApplication(sys.argv[:1] + qt_args)
     window = SystemMonitorApp()
     window.show()
     sys.exit(app.exec_())